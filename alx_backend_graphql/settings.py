@@ -29,6 +29,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "crm.middleware.RequestTimeMiddleware",
 ]
 
 ROOT_URLCONF = "alx_backend_graphql.urls"
@@ -87,4 +88,6 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 GRAPHENE = {
     "SCHEMA": "alx_backend_graphql.schema.schema",
+    # Connections without first/last are capped at this many rows.
+    "RELAY_CONNECTION_MAX_LIMIT": 100,
 }
@@ -1,7 +1,8 @@
 from django.contrib import admin
 from django.urls import path
 from django.views.decorators.csrf import csrf_exempt
-from graphene_django.views import GraphQLView
+
+from .views import CachedGraphQLView
 
 
 urlpatterns = [
@@ -9,7 +10,7 @@ urlpatterns = [
     path(
         "graphql",
         csrf_exempt(
-            GraphQLView.as_view(
+            CachedGraphQLView.as_view(
                 graphiql=True,
             )
         ),
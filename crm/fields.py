@@ -0,0 +1,266 @@
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Prefetch
+from graphene.utils.str_converters import to_snake_case
+from graphene_django.fields import DjangoConnectionField
+from graphene_django.filter import DjangoFilterConnectionField
+from graphene_django.filter.fields import convert_enum
+from graphql.language import FieldNode, FragmentSpreadNode, InlineFragmentNode
+
+
+# Reserved key (GraphQL names can't start with "__" outside introspection)
+# under which collect_fields records the argument names a field was given.
+ARGUMENTS_KEY = "__arguments__"
+
+PAGINATION_ARGS = frozenset(("first", "last", "before", "after", "offset"))
+
+
+def merge_fields(target, source):
+    """
+    Deep-merge the field map ``source`` into ``target``, so a field selected
+    more than once keeps the union of its subselections and arguments.
+    """
+    for name, value in source.items():
+        if name == ARGUMENTS_KEY:
+            target.setdefault(ARGUMENTS_KEY, set()).update(value)
+        else:
+            merge_fields(target.setdefault(name, {}), value)
+    return target
+
+
+def collect_fields(node, fragments):
+    """
+    Walk a selection set into a nested dict of requested field names,
+    expanding fragment spreads and inline fragments along the way.
+    """
+    fields = {}
+    if node.selection_set is None:
+        return fields
+
+    for selection in node.selection_set.selections:
+        if isinstance(selection, FieldNode):
+            name = selection.name.value
+            subfields = fields.setdefault(name, {})
+            if selection.arguments:
+                subfields.setdefault(ARGUMENTS_KEY, set()).update(
+                    argument.name.value for argument in selection.arguments
+                )
+            merge_fields(subfields, collect_fields(selection, fragments))
+        elif isinstance(selection, FragmentSpreadNode):
+            merge_fields(
+                fields,
+                collect_fields(fragments[selection.name.value], fragments),
+            )
+        elif isinstance(selection, InlineFragmentNode):
+            merge_fields(fields, collect_fields(selection, fragments))
+
+    return fields
+
+
+class BoundedCache:
+    """
+    Thread-safe LRU mapping that evicts the least recently used entry once
+    it holds more than ``maxsize`` items.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+# Parsed documents are reused across requests (see CachedGraphQLView), so the
+# same field nodes come back repeatedly. Entries keep a reference to their
+# nodes, which keeps the id()-based key from being recycled.
+_node_fields_cache = BoundedCache(maxsize=1024)
+
+
+def get_node_fields(info):
+    """
+    Return the fields requested on ``edges { node { ... } }`` of the
+    connection currently being resolved.
+    """
+    field_nodes = info.field_nodes
+    key = tuple(map(id, field_nodes))
+
+    cached = _node_fields_cache.get(key)
+    if cached is not None:
+        return cached[1]
+
+    fields = {}
+    for field_node in field_nodes:
+        selected = collect_fields(field_node, info.fragments)
+        merge_fields(fields, selected.get("edges", {}).get("node", {}))
+
+    _node_fields_cache.set(key, (tuple(field_nodes), fields))
+    return fields
+
+
+def get_model_fields(model, fields):
+    """
+    Resolve requested GraphQL field names to model fields, skipping
+    anything (``id``, ``__typename``, custom resolvers) that isn't one.
+    """
+    opts = model._meta
+    for name, subfields in fields.items():
+        try:
+            field = opts.get_field(to_snake_case(name))
+        except FieldDoesNotExist:
+            continue
+        yield field, subfields
+
+
+def get_optimizations(model, fields, prefix=""):
+    """
+    Work out the ``select_related`` paths, ``Prefetch`` objects and
+    ``only()`` columns needed to serve ``fields`` on ``model``, following
+    nested selections so deeper relations are batched too.
+    """
+    select, prefetch, columns = [], [], []
+
+    for field, subfields in get_model_fields(model, fields):
+        path = prefix + field.name
+        if not field.is_relation:
+            if field.concrete:
+                columns.append(path)
+        elif field.many_to_one or field.one_to_one:
+            select.append(path)
+            if field.concrete:
+                columns.append(path)
+            nested = get_optimizations(field.related_model, subfields, path + "__")
+            select.extend(nested[0])
+            prefetch.extend(nested[1])
+            columns.extend(nested[2])
+        elif field.many_to_many or field.one_to_many:
+            # Filter arguments make the nested connection re-query per row
+            # and ignore the prefetch cache, so prefetching would be wasted.
+            if subfields.get(ARGUMENTS_KEY, set()) - PAGINATION_ARGS:
+                continue
+            prefetch.append(get_prefetch(field, subfields, path))
+
+    return select, prefetch, columns
+
+
+def get_prefetch(field, subfields, path):
+    """
+    Build a ``Prefetch`` for a to-many relation whose queryset is itself
+    optimized for the fields selected under it (through ``edges { node }``
+    for connections).
+    """
+    if "edges" in subfields:
+        subfields = subfields["edges"].get("node", {})
+
+    related_model = field.related_model
+    select, prefetch, columns = get_optimizations(related_model, subfields)
+    if field.one_to_many and columns:
+        # The reverse FK is needed to attach each row to its parent.
+        columns.append(field.remote_field.name)
+
+    queryset = apply_optimizations(
+        related_model._default_manager.all(), select, prefetch, columns
+    )
+    return Prefetch(path, queryset=queryset)
+
+
+def apply_optimizations(queryset, select, prefetch, columns):
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    if columns:
+        queryset = queryset.only(*columns)
+    return queryset
+
+
+def optimize_queryset(queryset, info):
+    """
+    Apply ``select_related`` / ``prefetch_related`` for the relations that
+    are actually selected in the query, at every nesting level, so nested
+    lookups don't run N+1, and defer the columns nobody asked for.
+    """
+    select, prefetch, columns = get_optimizations(
+        queryset.model, get_node_fields(info)
+    )
+    return apply_optimizations(queryset, select, prefetch, columns)
+
+
+@lru_cache(maxsize=256)
+def get_filter_state(filterset_class, data):
+    """
+    Bind and validate ``filterset_class`` once per distinct set of filter
+    arguments, returning its filters and cleaned data for reuse.
+    """
+    model = filterset_class._meta.model
+    filterset = filterset_class(
+        data=dict(data),
+        queryset=model._default_manager.none(),
+    )
+    if not filterset.is_valid():
+        raise ValidationError(filterset.form.errors.as_json())
+    return filterset.filters, filterset.form.cleaned_data
+
+
+def apply_filterset(filterset_class, queryset, data, request=None):
+    """
+    Same result as ``filterset_class(data, queryset, request=request).qs``,
+    but reuses the validated form for repeated filter arguments.
+    """
+    try:
+        key = tuple(sorted(data.items()))
+        hash(key)
+    except TypeError:
+        filterset = filterset_class(data=data, queryset=queryset, request=request)
+        if not filterset.is_valid():
+            raise ValidationError(filterset.form.errors.as_json())
+        return filterset.qs
+
+    # The cached state is shared across requests and built without one, so
+    # FilterSets that read ``self.request`` must not go through this path.
+    filters, cleaned_data = get_filter_state(filterset_class, key)
+    for name, value in cleaned_data.items():
+        queryset = filters[name].filter(queryset, value)
+    return queryset
+
+
+class OptimizedFilterConnectionField(DjangoFilterConnectionField):
+    """
+    Filter connection field that caches filter validation per argument set
+    and optimizes the filtered queryset for the relations requested by the
+    client.
+    """
+
+    @classmethod
+    def resolve_queryset(
+        cls, connection, iterable, info, args, filtering_args, filterset_class
+    ):
+        data = {}
+        for k, v in args.items():
+            if k in filtering_args:
+                if k == "order_by" and v is not None:
+                    v = to_snake_case(v)
+                data[k] = convert_enum(v)
+
+        qs = DjangoConnectionField.resolve_queryset(connection, iterable, info, args)
+        qs = apply_filterset(filterset_class, qs, data, request=info.context)
+        return optimize_queryset(qs, info)
@@ -0,0 +1,15 @@
+from django.utils import timezone
+
+
+class RequestTimeMiddleware:
+    """
+    Stamp each request with a single ``timezone.now()`` so everything
+    created while handling it shares the same timestamp.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request._now = timezone.now()
+        return self.get_response(request)
@@ -1,35 +1,20 @@
-import re
 from decimal import Decimal, InvalidOperation
 
 import graphene
 from graphene import relay
 from graphene_django import DjangoObjectType
-from graphene_django.filter import DjangoFilterConnectionField
+from graphql_relay import from_global_id
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Sum
 from django.utils import timezone
 
+from .fields import OptimizedFilterConnectionField
 from .models import Customer, Product, Order
 from .filters import CustomerFilter, ProductFilter, OrderFilter
+from .validators import is_valid_phone, valid_phone_mask
 
 
-PHONE_REGEX = re.compile(r"^(\+?\d[\d\-]{6,20})$")
-
-
-class CustomerType(DjangoObjectType):
-    class Meta:
-        model = Customer
-        fields = ("id", "name", "email", "phone")
-
-
-class ProductType(DjangoObjectType):
-    class Meta:
-        model = Product
-        fields = ("id", "name", "price", "stock")
-
-
-class OrderType(DjangoObjectType):
-    class Meta:
-        model = Order
-        fields = ("id", "customer", "products", "total_amount", "order_date")
+TWOPLACES = Decimal("0.01")
 
 
 class CustomerNode(DjangoObjectType):
@@ -53,6 +38,21 @@ class OrderNode(DjangoObjectType):
         filterset_class = OrderFilter
 
 
+def parse_id(value, node_type):
+    """
+    Turn a raw integer id or a Relay global id of ``node_type`` into a
+    primary key, or return None if it is neither.
+    """
+    value = str(value).strip()
+    if (value[1:] if value[:1] in ("+", "-") else value).isdecimal():
+        return int(value)
+
+    type_name, pk = from_global_id(value)
+    if type_name != node_type._meta.name or not pk.isdecimal():
+        return None
+    return int(pk)
+
+
 class CustomerInput(graphene.InputObjectType):
     name = graphene.String(required=True)
     email = graphene.String(required=True)
@@ -77,13 +77,10 @@ class CreateCustomer(graphene.Mutation):
         email = graphene.String(required=True)
         phone = graphene.String(required=True)
 
-    customer = graphene.Field(CustomerType)
+    customer = graphene.Field(CustomerNode)
 
     def mutate(self, info, name, email, phone):
-        if Customer.objects.filter(email=email).exists():
-            raise Exception("Email already exists.")
-
-        if phone and not PHONE_REGEX.match(phone):
+        if phone and not is_valid_phone(phone):
             raise Exception("Invalid phone number format.")
 
         customer = Customer(
@@ -91,7 +88,13 @@ class CreateCustomer(graphene.Mutation):
             email=email,
             phone=phone,
         )
-        customer.save()
+        # Let the unique index on email reject duplicates atomically
+        # instead of checking for them in a separate query first.
+        try:
+            with transaction.atomic():
+                customer.save()
+        except IntegrityError:
+            raise Exception("Email already exists.")
 
         return CreateCustomer(customer=customer)
 
@@ -100,34 +103,52 @@ class BulkCreateCustomers(graphene.Mutation):
     class Arguments:
         customers = graphene.List(CustomerInput, required=True)
 
-    customers = graphene.List(CustomerType)
+    customers = graphene.List(CustomerNode)
     errors = graphene.List(graphene.String)
 
     def mutate(self, info, customers):
-        created_customers = []
         errors = []
 
-        for index, customer_input in enumerate(customers):
+        names = [customer_input.name for customer_input in customers]
+        emails = [customer_input.email for customer_input in customers]
+        phones = [customer_input.phone or "" for customer_input in customers]
+
+        existing = set(
+            Customer.objects.filter(email__in=emails).values_list(
+                "email", flat=True
+            )
+        )
+        phones_valid = valid_phone_mask(phones)
+        valid_mask = []
+
+        for index, (email, phone) in enumerate(zip(emails, phones)):
             row_errors = []
 
-            if Customer.objects.filter(email=customer_input.email).exists():
+            if email in existing:
                 row_errors.append("Email already exists.")
-
-            phone = customer_input.phone or ""
-            if phone and not PHONE_REGEX.match(phone):
+            if phone and not phones_valid[index]:
                 row_errors.append("Invalid phone number format.")
 
             if row_errors:
                 errors.append(f"Row {index}: " + "; ".join(row_errors))
+                valid_mask.append(False)
                 continue
 
-            customer = Customer(
-                name=customer_input.name,
-                email=customer_input.email,
-                phone=phone or None,
+            # Later rows reusing this email collide with it, as in the DB.
+            existing.add(email)
+            valid_mask.append(True)
+
+        to_create = [
+            Customer(name=name, email=email, phone=phone or None)
+            for name, email, phone, ok in zip(names, emails, phones, valid_mask)
+            if ok
+        ]
+
+        with transaction.atomic():
+            created_customers = Customer.objects.bulk_create(
+                to_create,
+                batch_size=500,
             )
-            customer.save()
-            created_customers.append(customer)
 
         return BulkCreateCustomers(
             customers=created_customers,
@@ -139,7 +160,7 @@ class CreateProduct(graphene.Mutation):
     class Arguments:
         input = ProductInput(required=True)
 
-    product = graphene.Field(ProductType)
+    product = graphene.Field(ProductNode)
     errors = graphene.List(graphene.String)
 
     def mutate(self, info, input):
@@ -147,7 +168,9 @@ class CreateProduct(graphene.Mutation):
         price_decimal = None
 
         try:
-            price_decimal = Decimal(str(input.price))
+            # str() gives the shortest repr of the float, i.e. the value the
+            # client sent; Decimal(float) would round its binary expansion.
+            price_decimal = Decimal(str(input.price)).quantize(TWOPLACES)
             if price_decimal <= 0:
                 errors.append("Price must be positive.")
         except (InvalidOperation, TypeError):
@@ -174,16 +197,17 @@ class CreateOrder(graphene.Mutation):
     class Arguments:
         input = OrderInput(required=True)
 
-    order = graphene.Field(OrderType)
+    order = graphene.Field(OrderNode)
     errors = graphene.List(graphene.String)
 
     def mutate(self, info, input):
         errors = []
 
-        try:
-            customer_id_int = int(input.customer_id)
-            customer = Customer.objects.get(id=customer_id_int)
-        except (ValueError, Customer.DoesNotExist):
+        customer_id = parse_id(input.customer_id, CustomerNode)
+        customer = None
+        if customer_id is not None:
+            customer = Customer.objects.filter(id=customer_id).first()
+        if customer is None:
             errors.append("Invalid customer ID.")
             return CreateOrder(order=None, errors=errors)
 
@@ -191,30 +215,37 @@ class CreateOrder(graphene.Mutation):
             errors.append("At least one product must be provided.")
             return CreateOrder(order=None, errors=errors)
 
-        product_ids_int = []
-        for pid in input.product_ids:
-            try:
-                product_ids_int.append(int(pid))
-            except ValueError:
-                errors.append(f"Invalid product ID: {pid}")
+        parsed_ids = [(pid, parse_id(pid, ProductNode)) for pid in input.product_ids]
+        product_ids_int = [pk for _, pk in parsed_ids if pk is not None]
+        errors.extend(
+            f"Invalid product ID: {pid}" for pid, pk in parsed_ids if pk is None
+        )
 
-        products = list(Product.objects.filter(id__in=product_ids_int))
-        if len(products) != len(set(product_ids_int)):
-            errors.append("One or more product IDs are invalid.")
+        requested = set(product_ids_int)
+        products = Product.objects.filter(id__in=requested)
+        agg = products.aggregate(total=Sum("price"), n=Count("id"))
+        if agg["n"] != len(requested):
+            found = set(products.values_list("id", flat=True))
+            errors.append(f"Invalid product IDs: {sorted(requested - found)}")
 
         if errors:
             return CreateOrder(order=None, errors=errors)
 
-        total_amount = sum((p.price for p in products), Decimal("0.00"))
-        order_date = input.order_date or timezone.now()
-
-        order = Order(
-            customer=customer,
-            total_amount=total_amount,
-            order_date=order_date,
+        total_amount = agg["total"]
+        order_date = (
+            input.order_date
+            or getattr(info.context, "_now", None)
+            or timezone.now()
         )
-        order.save()
-        order.products.set(products)
+
+        with transaction.atomic():
+            order = Order(
+                customer=customer,
+                total_amount=total_amount,
+                order_date=order_date,
+            )
+            order.save()
+            order.products.add(*requested)
 
         return CreateOrder(order=order, errors=[])
 
@@ -227,10 +258,15 @@ class Mutation(graphene.ObjectType):
 
 
 class Query(graphene.ObjectType):
-    all_customers = graphene.List(CustomerType)
-    all_customers = DjangoFilterConnectionField(CustomerNode)
-    all_products = DjangoFilterConnectionField(ProductNode)
-    all_orders = DjangoFilterConnectionField(OrderNode)
+    all_customers = OptimizedFilterConnectionField(CustomerNode)
+    all_products = OptimizedFilterConnectionField(ProductNode)
+    all_orders = OptimizedFilterConnectionField(OrderNode)
 
     def resolve_all_customers(self, info, **kwargs):
         return Customer.objects.all()
+
+    def resolve_all_products(self, info, **kwargs):
+        return Product.objects.all()
+
+    def resolve_all_orders(self, info, **kwargs):
+        return Order.objects.all()
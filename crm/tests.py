@@ -1,6 +1,605 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+import graphene
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from graphql import execute, parse, validate
+from graphql_relay import to_global_id
+
+from alx_backend_graphql.schema import schema
+from alx_backend_graphql.views import CachedGraphQLView
+
+from . import fields, validators
+from .middleware import RequestTimeMiddleware
+from .models import Customer, Product, Order
+from .schema import Mutation, Query
 
 
 class SmokeTest(TestCase):
     def test_basic_math(self):
         self.assertEqual(1 + 1, 2)
+
+
+class AllOrdersQueryTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        product = Product.objects.create(name="Laptop", price=Decimal("999.99"))
+        for i in range(5):
+            customer = Customer.objects.create(
+                name=f"Customer {i}",
+                email=f"customer{i}@example.com",
+            )
+            order = Order.objects.create(
+                customer=customer,
+                total_amount=product.price,
+            )
+            order.products.set([product])
+
+    def test_customer_is_selected_in_one_query(self):
+        query = """
+            query {
+                allOrders {
+                    edges { node { id ...OrderCustomer } }
+                }
+            }
+            fragment OrderCustomer on OrderNode {
+                customer { name }
+            }
+        """
+        # COUNT + SELECT ... JOIN customer
+        with self.assertNumQueries(2):
+            result = schema.execute(query)
+
+        self.assertIsNone(result.errors)
+        self.assertEqual(len(result.data["allOrders"]["edges"]), 5)
+
+    def test_repeated_selections_are_merged(self):
+        query = """
+            query {
+                allOrders {
+                    edges { node { totalAmount customer { name } ...OrderCustomer } }
+                    edges { node { ... on OrderNode { orderDate customer { phone } } } }
+                }
+            }
+            fragment OrderCustomer on OrderNode {
+                customer { email }
+            }
+        """
+        # COUNT + SELECT ... JOIN customer, with no deferred-field reloads
+        with self.assertNumQueries(2):
+            result = schema.execute(query)
+
+        self.assertIsNone(result.errors)
+        node = result.data["allOrders"]["edges"][0]["node"]
+        self.assertEqual(set(node["customer"]), {"name", "email", "phone"})
+        self.assertIn("orderDate", node)
+
+    def test_nested_relations_are_batched(self):
+        query = """
+            query {
+                allCustomers {
+                    edges { node {
+                        orders { edges { node {
+                            customer { email }
+                            products { edges { node { name } } }
+                        } } }
+                    } }
+                }
+            }
+        """
+        # COUNT + customers + orders JOIN customer + products
+        with self.assertNumQueries(4):
+            result = schema.execute(query)
+
+        self.assertIsNone(result.errors)
+        self.assertEqual(len(result.data["allCustomers"]["edges"]), 5)
+
+    def test_filtered_nested_connection_is_not_prefetched(self):
+        query = """
+            query {
+                allOrders {
+                    edges { node {
+                        products(nameIcontains: "Laptop") {
+                            edges { node { name } }
+                        }
+                    } }
+                }
+            }
+        """
+        # COUNT + orders, then COUNT + SELECT per order for the filtered
+        # products; no prefetch query that the filter would throw away.
+        with CaptureQueriesContext(connection) as ctx:
+            result = schema.execute(query)
+
+        self.assertIsNone(result.errors)
+        self.assertEqual(len(ctx.captured_queries), 2 + 2 * 5)
+        self.assertFalse(
+            any("_prefetch_related_val" in q["sql"] for q in ctx.captured_queries)
+        )
+
+    def test_paginated_nested_connection_uses_prefetch(self):
+        query = """
+            query {
+                allOrders {
+                    edges { node { products(first: 1) { edges { node { name } } } } }
+                }
+            }
+        """
+        # COUNT + orders + products
+        with self.assertNumQueries(3):
+            result = schema.execute(query)
+
+        self.assertIsNone(result.errors)
+
+    def test_only_selected_columns_are_loaded(self):
+        query = """
+            query {
+                allOrders {
+                    edges { node { totalAmount customer { name } } }
+                }
+            }
+        """
+        with CaptureQueriesContext(connection) as ctx:
+            result = schema.execute(query)
+
+        self.assertIsNone(result.errors)
+        sql = ctx.captured_queries[-1]["sql"]
+        self.assertIn('"crm_order"."total_amount"', sql)
+        self.assertIn('"crm_customer"."name"', sql)
+        self.assertNotIn('"crm_order"."order_date"', sql)
+        self.assertNotIn('"crm_customer"."email"', sql)
+
+
+class BulkCreateCustomersTest(TestCase):
+    mutation = """
+        mutation ($customers: [CustomerInput]!) {
+            bulkCreateCustomers(customers: $customers) {
+                customers { id email }
+                errors
+            }
+        }
+    """
+
+    def setUp(self):
+        self.schema = graphene.Schema(query=Query, mutation=Mutation)
+        Customer.objects.create(name="Alice", email="alice@example.com")
+
+    def test_duplicates_are_reported_per_row(self):
+        customers = [
+            {"name": "Alice", "email": "alice@example.com"},
+            {"name": "Bob", "email": "bob@example.com", "phone": "123-456-7890"},
+            {"name": "Bob Again", "email": "bob@example.com"},
+            {"name": "Carol", "email": "carol@example.com", "phone": "abc"},
+        ]
+        result = self.schema.execute(
+            self.mutation,
+            variable_values={"customers": customers},
+        )
+
+        self.assertIsNone(result.errors)
+        payload = result.data["bulkCreateCustomers"]
+        self.assertEqual(
+            [c["email"] for c in payload["customers"]],
+            ["bob@example.com"],
+        )
+        self.assertEqual(
+            payload["errors"],
+            [
+                "Row 0: Email already exists.",
+                "Row 2: Email already exists.",
+                "Row 3: Invalid phone number format.",
+            ],
+        )
+        self.assertEqual(Customer.objects.count(), 2)
+
+
+class GraphQLEndpointTest(TestCase):
+    def setUp(self):
+        CachedGraphQLView._document_cache.clear()
+
+    def test_repeated_query_reuses_cached_document(self):
+        Customer.objects.create(name="Alice", email="alice@example.com")
+        body = {"query": "{ allCustomers { edges { node { name } } } }"}
+
+        with mock.patch(
+            "alx_backend_graphql.views.validate", wraps=validate
+        ) as validate_spy:
+            for _ in range(2):
+                response = self.client.post(
+                    "/graphql", body, content_type="application/json"
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    response.json()["data"]["allCustomers"]["edges"],
+                    [{"node": {"name": "Alice"}}],
+                )
+
+        self.assertEqual(validate_spy.call_count, 1)
+
+
+class CreateOrderTest(TestCase):
+    mutation = """
+        mutation ($input: OrderInput!) {
+            createOrder(input: $input) {
+                order { totalAmount products { edges { node { name } } } }
+                errors
+            }
+        }
+    """
+
+    def setUp(self):
+        self.schema = graphene.Schema(query=Query, mutation=Mutation)
+        self.customer = Customer.objects.create(
+            name="Alice",
+            email="alice@example.com",
+        )
+        self.laptop = Product.objects.create(name="Laptop", price=Decimal("999.99"))
+        self.mouse = Product.objects.create(name="Mouse", price=Decimal("25.50"))
+
+    def create_order(self, product_ids):
+        return self.schema.execute(
+            self.mutation,
+            variable_values={
+                "input": {
+                    "customerId": str(self.customer.id),
+                    "productIds": product_ids,
+                }
+            },
+        )
+
+    def test_total_is_sum_of_distinct_products(self):
+        result = self.create_order(
+            [str(self.laptop.id), str(self.mouse.id), str(self.mouse.id)]
+        )
+
+        self.assertIsNone(result.errors)
+        payload = result.data["createOrder"]
+        self.assertEqual(payload["errors"], [])
+        self.assertEqual(Decimal(payload["order"]["totalAmount"]), Decimal("1025.49"))
+        order = Order.objects.get()
+        self.assertEqual(
+            set(order.products.values_list("id", flat=True)),
+            {self.laptop.id, self.mouse.id},
+        )
+
+    def test_unknown_product_is_rejected(self):
+        result = self.create_order([str(self.laptop.id), "999", "998"])
+
+        self.assertEqual(
+            result.data["createOrder"]["errors"],
+            ["Invalid product IDs: [998, 999]"],
+        )
+        self.assertFalse(Order.objects.exists())
+
+    def test_order_date_defaults_to_request_time(self):
+        now = timezone.now() - timedelta(minutes=5)
+        context = RequestFactory().post("/graphql")
+        context._now = now
+
+        self.schema.execute(
+            self.mutation,
+            context_value=context,
+            variable_values={
+                "input": {
+                    "customerId": str(self.customer.id),
+                    "productIds": [str(self.laptop.id)],
+                }
+            },
+        )
+
+        self.assertEqual(Order.objects.get().order_date, now)
+
+    def test_accepts_ids_returned_by_the_api(self):
+        created = self.schema.execute(
+            """
+            mutation {
+                createCustomer(name: "Bob", email: "bob@example.com", phone: "") {
+                    customer { id }
+                }
+            }
+            """
+        )
+        products = self.schema.execute(
+            "{ allProducts(nameIcontains: \"Laptop\") { edges { node { id } } } }"
+        )
+        customer_id = created.data["createCustomer"]["customer"]["id"]
+        product_id = products.data["allProducts"]["edges"][0]["node"]["id"]
+
+        result = self.schema.execute(
+            self.mutation,
+            variable_values={
+                "input": {"customerId": customer_id, "productIds": [product_id]}
+            },
+        )
+
+        self.assertEqual(result.data["createOrder"]["errors"], [])
+        order = Order.objects.get()
+        self.assertEqual(order.customer.email, "bob@example.com")
+        self.assertEqual(list(order.products.all()), [self.laptop])
+
+    def test_global_id_of_another_type_is_rejected(self):
+        result = self.schema.execute(
+            self.mutation,
+            variable_values={
+                "input": {
+                    "customerId": to_global_id("ProductNode", self.customer.id),
+                    "productIds": [str(self.laptop.id)],
+                }
+            },
+        )
+
+        self.assertEqual(
+            result.data["createOrder"]["errors"], ["Invalid customer ID."]
+        )
+
+    def test_signed_and_padded_ids_are_accepted(self):
+        result = self.schema.execute(
+            self.mutation,
+            variable_values={
+                "input": {
+                    "customerId": f" {self.customer.id} ",
+                    "productIds": [f"+{self.laptop.id}", f" {self.mouse.id}"],
+                }
+            },
+        )
+
+        self.assertEqual(result.data["createOrder"]["errors"], [])
+        self.assertEqual(Order.objects.get().products.count(), 2)
+
+    def test_malformed_customer_id_is_rejected_without_a_query(self):
+        with self.assertNumQueries(0):
+            result = self.schema.execute(
+                self.mutation,
+                variable_values={
+                    "input": {
+                        "customerId": "abc",
+                        "productIds": [str(self.laptop.id)],
+                    }
+                },
+            )
+
+        self.assertEqual(
+            result.data["createOrder"]["errors"], ["Invalid customer ID."]
+        )
+
+    def test_malformed_product_ids_are_reported(self):
+        result = self.create_order([str(self.laptop.id), "abc", "1.5", "--5", "-"])
+
+        self.assertEqual(
+            result.data["createOrder"]["errors"],
+            [
+                "Invalid product ID: abc",
+                "Invalid product ID: 1.5",
+                "Invalid product ID: --5",
+                "Invalid product ID: -",
+            ],
+        )
+
+
+class PhoneValidationTest(TestCase):
+    phones = [
+        "+1234567890",
+        "123-456-7890",
+        "",
+        "12",
+        "abc-def-ghij",
+        "+1-234-5678",
+        "١٢٣٤٥٦٧٨",
+        "1234567\n",
+    ]
+
+    def test_batch_matches_regex(self):
+        expected = [
+            validators.PHONE_REGEX.fullmatch(phone) is not None
+            for phone in self.phones
+        ]
+        self.assertEqual(validators.valid_phone_mask(self.phones), expected)
+
+        with mock.patch.object(validators, "PHONE_DATABASE", None):
+            self.assertEqual(validators.valid_phone_mask(self.phones), expected)
+
+    def test_single_phone_matches_regex(self):
+        for phone in self.phones + ["+", "+-1234567", "1-------", "1" * 22]:
+            with self.subTest(phone=phone):
+                self.assertEqual(
+                    validators.is_valid_phone(phone),
+                    validators.PHONE_REGEX.fullmatch(phone) is not None,
+                )
+
+    def test_batch_and_single_agree(self):
+        self.assertEqual(
+            validators.valid_phone_mask(self.phones),
+            [validators.is_valid_phone(phone) for phone in self.phones],
+        )
+        self.assertEqual(validators.valid_phone_mask(["1234567\n"]), [False])
+
+
+class NodeFieldsCacheTest(TestCase):
+    def test_reused_document_is_walked_once(self):
+        document = parse("{ allOrders { edges { node { customer { name } } } } }")
+
+        with mock.patch(
+            "crm.fields.collect_fields", wraps=fields.collect_fields
+        ) as collect_spy:
+            first = execute(schema.graphql_schema, document)
+            calls = collect_spy.call_count
+            second = execute(schema.graphql_schema, document)
+
+        self.assertIsNone(first.errors)
+        self.assertEqual(first.data, second.data)
+        self.assertGreater(calls, 0)
+        self.assertEqual(collect_spy.call_count, calls)
+
+
+class CreateProductTest(TestCase):
+    mutation = """
+        mutation ($input: ProductInput!) {
+            createProduct(input: $input) {
+                product { price }
+                errors
+            }
+        }
+    """
+
+    def setUp(self):
+        self.schema = graphene.Schema(query=Query, mutation=Mutation)
+
+    def create_product(self, price):
+        return self.schema.execute(
+            self.mutation,
+            variable_values={"input": {"name": "Laptop", "price": price}},
+        )
+
+    def test_price_is_rounded_to_cents(self):
+        result = self.create_product(999.99)
+
+        self.assertEqual(result.data["createProduct"]["errors"], [])
+        self.assertEqual(Product.objects.get().price, Decimal("999.99"))
+
+    def test_price_is_rounded_from_the_sent_value(self):
+        for sent, stored in [(2.675, "2.68"), (0.015, "0.02")]:
+            with self.subTest(price=sent):
+                result = self.create_product(sent)
+
+                self.assertEqual(result.data["createProduct"]["errors"], [])
+                self.assertEqual(
+                    Product.objects.latest("id").price,
+                    Decimal(stored),
+                )
+
+    def test_price_rounding_to_zero_is_rejected(self):
+        result = self.create_product(0.001)
+
+        self.assertEqual(
+            result.data["createProduct"]["errors"],
+            ["Price must be positive."],
+        )
+
+
+class CreateCustomerTest(TestCase):
+    mutation = """
+        mutation ($name: String!, $email: String!, $phone: String!) {
+            createCustomer(name: $name, email: $email, phone: $phone) {
+                customer { email }
+            }
+        }
+    """
+
+    def setUp(self):
+        self.schema = graphene.Schema(query=Query, mutation=Mutation)
+
+    def create_customer(self, email, phone="+1234567890"):
+        return self.schema.execute(
+            self.mutation,
+            variable_values={"name": "Alice", "email": email, "phone": phone},
+        )
+
+    def test_duplicate_email_is_rejected(self):
+        first = self.create_customer("alice@example.com")
+        second = self.create_customer("alice@example.com")
+
+        self.assertIsNone(first.errors)
+        self.assertEqual(second.errors[0].message, "Email already exists.")
+        self.assertEqual(Customer.objects.count(), 1)
+
+    def test_invalid_phone_is_rejected(self):
+        result = self.create_customer("alice@example.com", phone="12")
+
+        self.assertEqual(result.errors[0].message, "Invalid phone number format.")
+        self.assertFalse(Customer.objects.exists())
+
+
+class FilterCacheTest(TestCase):
+    def setUp(self):
+        fields.get_filter_state.cache_clear()
+        Product.objects.create(name="Laptop", price=Decimal("999.99"))
+        Product.objects.create(name="Mouse", price=Decimal("25.50"))
+
+    def test_repeated_filters_reuse_validated_form(self):
+        query = "{ allProducts(priceGte: 100) { edges { node { name } } } }"
+
+        for _ in range(2):
+            result = schema.execute(query)
+            self.assertIsNone(result.errors)
+            self.assertEqual(
+                result.data["allProducts"]["edges"],
+                [{"node": {"name": "Laptop"}}],
+            )
+
+        info = fields.get_filter_state.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 1))
+
+    def test_invalid_filter_is_reported(self):
+        result = schema.execute(
+            '{ allCustomers(createdAtGte: "not-a-date") { edges { node { name } } } }'
+        )
+
+        self.assertIsNotNone(result.errors)
+
+
+class BoundedCacheTest(TestCase):
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = fields.BoundedCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+
+
+class RequestTimeMiddlewareTest(TestCase):
+    def test_request_is_stamped_once(self):
+        seen = []
+
+        def get_response(request):
+            seen.extend([request._now, request._now])
+            return "response"
+
+        middleware = RequestTimeMiddleware(get_response)
+        with mock.patch(
+            "crm.middleware.timezone.now", wraps=timezone.now
+        ) as now_spy:
+            response = middleware(RequestFactory().post("/graphql"))
+
+        self.assertEqual(response, "response")
+        self.assertEqual(now_spy.call_count, 1)
+        self.assertIs(seen[0], seen[1])
+
+    def test_orders_in_one_request_share_the_stamp(self):
+        customer = Customer.objects.create(name="Alice", email="alice@example.com")
+        product = Product.objects.create(name="Laptop", price=Decimal("999.99"))
+        mutation = """
+            mutation ($input: OrderInput!) {
+                a: createOrder(input: $input) { errors }
+                b: createOrder(input: $input) { errors }
+            }
+        """
+        graphql_schema = graphene.Schema(query=Query, mutation=Mutation)
+
+        def get_response(request):
+            return graphql_schema.execute(
+                mutation,
+                context_value=request,
+                variable_values={
+                    "input": {
+                        "customerId": str(customer.id),
+                        "productIds": [str(product.id)],
+                    }
+                },
+            )
+
+        request = RequestFactory().post("/graphql")
+        result = RequestTimeMiddleware(get_response)(request)
+
+        self.assertIsNone(result.errors)
+        self.assertEqual(
+            set(Order.objects.values_list("order_date", flat=True)),
+            {request._now},
+        )
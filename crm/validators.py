@@ -0,0 +1,89 @@
+import re
+import threading
+
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+
+PHONE_PATTERN = r"^(\+?\d[\d\-]{6,20})$"
+
+PHONE_REGEX = re.compile(PHONE_PATTERN)
+
+
+def _compile_phone_database():
+    if hyperscan is None:
+        return None
+
+    db = hyperscan.Database()
+    db.compile(
+        expressions=[PHONE_PATTERN.encode("ascii")],
+        ids=[0],
+        flags=[hyperscan.HS_FLAG_MULTILINE],
+    )
+    return db
+
+
+PHONE_DATABASE = _compile_phone_database()
+# Hyperscan scratch space is shared by the database, so scans are serialised.
+_phone_database_lock = threading.Lock()
+
+
+def is_valid_phone(phone):
+    """
+    Hand-rolled equivalent of ``PHONE_PATTERN`` for a single number: an
+    optional ``+``, a digit, then 6-20 digits or dashes.
+    """
+    body = phone[1:] if phone.startswith("+") else phone
+    if not 7 <= len(body) <= 21 or not body[0].isdecimal():
+        return False
+    return all(c.isdecimal() or c == "-" for c in body[1:])
+
+
+def valid_phone_mask(phones):
+    """
+    Validate a batch of phone numbers, returning one bool per input.
+
+    With hyperscan available, all plain-ASCII numbers are joined into one
+    newline-separated buffer and scanned in a single pass; anything else
+    falls back to ``PHONE_REGEX``. Either way the whole string must match,
+    as in ``is_valid_phone``.
+    """
+    mask = [False] * len(phones)
+
+    if PHONE_DATABASE is None:
+        for index, phone in enumerate(phones):
+            mask[index] = PHONE_REGEX.fullmatch(phone) is not None
+        return mask
+
+    lines = []
+    line_ends = {}
+    offset = 0
+    for index, phone in enumerate(phones):
+        if "\n" in phone:
+            continue
+        if not phone.isascii():
+            mask[index] = PHONE_REGEX.fullmatch(phone) is not None
+            continue
+        if lines:
+            offset += 1
+        offset += len(phone)
+        lines.append(phone)
+        line_ends[offset] = index
+
+    if not lines:
+        return mask
+
+    def on_match(pattern_id, start, end, flags, context):
+        index = line_ends.get(end)
+        if index is not None:
+            mask[index] = True
+
+    with _phone_database_lock:
+        PHONE_DATABASE.scan(
+            "\n".join(lines).encode("ascii"),
+            match_event_handler=on_match,
+        )
+
+    return mask
@@ -2,6 +2,7 @@ import os
 from decimal import Decimal
 
 import django
+from django.db import transaction
 from django.utils import timezone
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "graphql_crm.settings")
@@ -11,69 +12,80 @@ from crm.models import Customer, Product, Order  # noqa: E402
 
 
 def run():
-    # Optional: clear existing data
-    Order.objects.all().delete()
-    Product.objects.all().delete()
-    Customer.objects.all().delete()
+    with transaction.atomic():
+        # Optional: clear existing data
+        Order.objects.all().delete()
+        Product.objects.all().delete()
+        Customer.objects.all().delete()
 
-    # Create customers
-    alice = Customer.objects.create(
-        name="Alice Johnson",
-        email="alice@example.com",
-        phone="+1234567890",
-    )
-    bob = Customer.objects.create(
-        name="Bob Smith",
-        email="bob@example.com",
-        phone="123-456-7890",
-    )
-    carol = Customer.objects.create(
-        name="Carol Davis",
-        email="carol@example.com",
-        phone=None,
-    )
+        # Create customers
+        alice, bob, carol = Customer.objects.bulk_create(
+            [
+                Customer(
+                    name="Alice Johnson",
+                    email="alice@example.com",
+                    phone="+1234567890",
+                ),
+                Customer(
+                    name="Bob Smith",
+                    email="bob@example.com",
+                    phone="123-456-7890",
+                ),
+                Customer(
+                    name="Carol Davis",
+                    email="carol@example.com",
+                    phone=None,
+                ),
+            ]
+        )
 
-    # Create products
-    laptop = Product.objects.create(
-        name="Laptop",
-        price=Decimal("999.99"),
-        stock=10,
-    )
-    mouse = Product.objects.create(
-        name="Wireless Mouse",
-        price=Decimal("25.50"),
-        stock=100,
-    )
-    keyboard = Product.objects.create(
-        name="Mechanical Keyboard",
-        price=Decimal("79.90"),
-        stock=50,
-    )
+        # Create products
+        laptop, mouse, keyboard = Product.objects.bulk_create(
+            [
+                Product(
+                    name="Laptop",
+                    price=Decimal("999.99"),
+                    stock=10,
+                ),
+                Product(
+                    name="Wireless Mouse",
+                    price=Decimal("25.50"),
+                    stock=100,
+                ),
+                Product(
+                    name="Mechanical Keyboard",
+                    price=Decimal("79.90"),
+                    stock=50,
+                ),
+            ]
+        )
 
-    # Create orders
-    order1_total = laptop.price + mouse.price
-    order1 = Order.objects.create(
-        customer=alice,
-        total_amount=order1_total,
-        order_date=timezone.now(),
-    )
-    order1.products.set([laptop, mouse])
+        # Create orders
+        now = timezone.now()
+        order_products = [
+            (alice, [laptop, mouse]),
+            (bob, [mouse, keyboard]),
+            (carol, [keyboard]),
+        ]
+        orders = Order.objects.bulk_create(
+            [
+                Order(
+                    customer=customer,
+                    total_amount=sum(p.price for p in products),
+                    order_date=now,
+                )
+                for customer, products in order_products
+            ]
+        )
 
-    order2_total = mouse.price + keyboard.price
-    order2 = Order.objects.create(
-        customer=bob,
-        total_amount=order2_total,
-        order_date=timezone.now(),
-    )
-    order2.products.set([mouse, keyboard])
-
-    order3_total = keyboard.price
-    order3 = Order.objects.create(
-        customer=carol,
-        total_amount=order3_total,
-        order_date=timezone.now(),
-    )
-    order3.products.set([keyboard])
+        OrderProduct = Order.products.through
+        OrderProduct.objects.bulk_create(
+            [
+                OrderProduct(order_id=order.id, product_id=product.id)
+                for order, (_, products) in zip(orders, order_products)
+                for product in products
+            ]
+        )
 
     print("Database seeded successfully.")
 